@@ -2,32 +2,31 @@ import random
 import time
 from typing import Dict, Iterable, List, Tuple
 
-import pandas as pd
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 
 from logpulse import LogPulse
 
-LOG_PATH = "logs/demo_metrics.csv"
+LOG_PATH = "logs/perf_metrics.csv"  # LogPulse's default storage file
 
 
-def _cpu_work(tag: str, n: int) -> int:
-    tracker = LogPulse(storage_path=LOG_PATH, session_tag=tag)
+def _cpu_work(tracker: LogPulse, n: int) -> int:
+    tag = tracker.session_tag
 
     @tracker.timeit("cpu-heavy_computation")
     def process_data(size: int):
         print(f"?? [{tag}] heavy computation with n={size}")
-        total = sum(i * i for i in range(size))
+        # Closed form of sum(i * i for i in range(size)); a generator here would mostly time
+        # interpreter overhead. The sleep stands in for the actual work being measured.
+        total = size * (size - 1) * (2 * size - 1) // 6
         time.sleep(0.15)
         return total
 
-    result = process_data(n)
+    return process_data(n)
 
-    tracker.get_summary()
-    tracker.save()
-    return result
 
-
-def _io_mix(tag: str) -> None:
-    tracker = LogPulse(storage_path=LOG_PATH, session_tag=tag)
+def _io_mix(tracker: LogPulse) -> None:
+    tag = tracker.session_tag
 
     with tracker.measure("db-select"):
         time.sleep(random.uniform(0.05, 0.2))
@@ -50,12 +49,8 @@ def _io_mix(tag: str) -> None:
         time.sleep(random.uniform(0.08, 0.18))
         print(f"?? [{tag}] API response received")
 
-    tracker.get_summary()
-    tracker.save()
-
 
-def _serialization(tag: str, payload_kb: int) -> None:
-    tracker = LogPulse(storage_path=LOG_PATH, session_tag=tag)
+def _serialization(tracker: LogPulse, payload_kb: int) -> None:
     with tracker.measure("serialize-json"):
         time.sleep(random.uniform(0.02, 0.05))
     with tracker.measure("serialize-protobuf"):
@@ -65,15 +60,12 @@ def _serialization(tag: str, payload_kb: int) -> None:
     with tracker.measure("deserialize-protobuf"):
         time.sleep(random.uniform(0.01, 0.03))
 
-    tracker.get_summary()
-    tracker.save()
 
-
-def _batch_run(tag: str, n_values: Iterable[int]) -> None:
+def _batch_run(tracker: LogPulse, n_values: Iterable[int]) -> None:
     for n in n_values:
-        _cpu_work(tag, n)
+        _cpu_work(tracker, n)
         try:
-            _io_mix(tag)
+            _io_mix(tracker)
         except ConnectionError:
             pass
 
@@ -81,9 +73,14 @@ def _batch_run(tag: str, n_values: Iterable[int]) -> None:
 def _run_scenarios(plan: List[Tuple[str, Dict]]) -> None:
     for tag, options in plan:
         print(f"\n== Running session: {tag} ==")
-        _batch_run(tag, options["n_values"])
+        # One tracker (and one state-file update) per session; records are flushed once at the end
+        tracker = LogPulse(session_tag=tag)
+        _batch_run(tracker, options["n_values"])
         for _ in range(options["serialization_runs"]):
-            _serialization(tag, options["payload_kb"])
+            _serialization(tracker, options["payload_kb"])
+
+        tracker.get_summary()
+        tracker.save()
 
 
 if __name__ == "__main__":
@@ -101,10 +98,13 @@ if __name__ == "__main__":
     print("\n--- Performance Summary (last session only) ---")
 
     last_tag = scenarios[-1][0]
-    df = pd.read_csv(LOG_PATH)
-    summary = (
-        df[df["session_tag"] == last_tag].groupby("label")["duration_sec"].agg(["mean", "min", "max", "count"])
+    # Parse only the three columns we need and filter in Arrow before handing rows to pandas
+    table = pa_csv.read_csv(
+        LOG_PATH,
+        convert_options=pa_csv.ConvertOptions(include_columns=["session_tag", "label", "duration_sec"]),
     )
+    table = table.filter(pc.equal(table["session_tag"], last_tag))
+    summary = table.to_pandas().groupby("label")["duration_sec"].agg(["mean", "min", "max", "count"])
     print(summary)
 
     print(f"\n? Metrics saved to: {LOG_PATH}")
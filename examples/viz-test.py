@@ -8,45 +8,33 @@ from logpulse.viz import PulseVisualizer
 
 def generate_battle_data(path="logs/viz_test.csv"):
     os.makedirs("logs", exist_ok=True)
-    data = []
+    rng = np.random.default_rng()
+    durations = np.empty(8500)
 
     # Session 1: The "Stable Veteran" (GPT-3.5)
     # 5,000 runs, very consistent, low latency.
-    for i in range(1, 5001):
-        data.append(
-            {
-                "run_id": i,
-                "session_tag": "gpt-3.5-stable",
-                "duration_sec": np.random.normal(0.4, 0.05),  # Mean 0.4s, low jitter
-                "status": "SUCCESS",
-            }
-        )
+    durations[:5000] = rng.normal(0.4, 0.05, 5000)  # Mean 0.4s, low jitter
 
     # Session 2: The "Spiky Powerhouse" (GPT-4o)
     # 2,000 runs, faster mean but massive outliers (cold starts).
-    for i in range(5001, 7001):
-        latency = np.random.normal(0.3, 0.02)
-        if i % 50 == 0:
-            latency += 2.5  # Simulate a heavy outlier every 50 runs
-        data.append(
-            {"run_id": i, "session_tag": "gpt-4o-spiky", "duration_sec": max(0.1, latency), "status": "SUCCESS"}
-        )
+    spiky = rng.normal(0.3, 0.02, 2000)
+    spiky[np.arange(2000) % 50 == 49] += 2.5  # Simulate a heavy outlier every 50 runs
+    durations[5000:7000] = np.maximum(0.1, spiky)
 
     # Session 3: The "Degrading Agent" (Local LLM)
     # 1,500 runs, starts fast but gets slower over time (memory leak simulation).
-    for i in range(7001, 8501):
-        leak_factor = (i - 7000) * 0.0005
-        data.append(
-            {
-                "run_id": i,
-                "session_tag": "local-llm-leak",
-                "duration_sec": np.random.normal(0.5 + leak_factor, 0.1),
-                "status": "SUCCESS",
-            }
-        )
-
-    pd.DataFrame(data).to_csv(path, index=False)
-    print(f"🔥 Battle-test data generated: {len(data)} rows.")
+    leak_factor = np.arange(1, 1501) * 0.0005
+    durations[7000:] = rng.normal(0.5 + leak_factor, 0.1)
+
+    pd.DataFrame(
+        {
+            "run_id": np.arange(1, 8501),
+            "session_tag": np.repeat(["gpt-3.5-stable", "gpt-4o-spiky", "local-llm-leak"], [5000, 2000, 1500]),
+            "duration_sec": durations,
+            "status": "SUCCESS",
+        }
+    ).to_csv(path, index=False)
+    print(f"🔥 Battle-test data generated: {len(durations)} rows.")
 
 
 # --- The Battle Test ---
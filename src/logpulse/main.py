@@ -1,29 +1,201 @@
+import codecs
+import inspect
 import json
+import mmap
+import os
+import shutil
+import struct
 import time
+from array import array
+from contextlib import contextmanager
 from datetime import datetime
 from functools import wraps
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
 
+import numpy as np
 import pandas as pd
 
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locking
+    fcntl = None
+
+_SUCCESS = 0  # Status code for a measurement that exited cleanly
+
+_CSV_COLUMNS = (
+    "global_run_id",
+    "session_run_id",
+    "session_tag",
+    "timestamp",
+    "label",
+    "duration_sec",
+    "status",
+)
+_CSV_ROW = b"%d,%d,%b,%b,%b,%.9f,%b\n"
+
+
+# Binary state layout: [magic:4][global:8][n_sessions:4] + n_sessions * [tag_len:2][tag:utf-8][counter:8]
+_STATE_MAGIC = b"LPS1"
+_STATE_HEADER = struct.Struct("<4sqI")
+_STATE_GLOBAL_OFFSET = 4
+_TAG_LEN = struct.Struct("<H")
+_COUNTER = struct.Struct("<q")
+
+
+def _parse_state(buf) -> Tuple[int, Dict[str, int], int]:
+    """Returns (global_counter, {tag: counter_offset}, end_offset) for a binary state buffer."""
+    magic, global_counter, n_sessions = _STATE_HEADER.unpack_from(buf, 0)
+    if magic != _STATE_MAGIC:
+        raise ValueError("Not a LogPulse state file")
+
+    offsets: Dict[str, int] = {}
+    pos = _STATE_HEADER.size
+    for _ in range(n_sessions):
+        (tag_len,) = _TAG_LEN.unpack_from(buf, pos)
+        pos += _TAG_LEN.size
+        tag = bytes(buf[pos : pos + tag_len]).decode("utf-8")
+        pos += tag_len
+        offsets[tag] = pos
+        pos += _COUNTER.size
+    if pos > len(buf):
+        raise ValueError("Truncated LogPulse state file")
+    return global_counter, offsets, pos
+
+
+def _pack_session(tag: str, counter: int) -> bytes:
+    raw = tag.encode("utf-8")
+    return _TAG_LEN.pack(len(raw)) + raw + _COUNTER.pack(counter)
+
+
+def _pack_state(state: Dict) -> bytes:
+    counters = state.get("session_counters", {})
+    header = _STATE_HEADER.pack(_STATE_MAGIC, int(state.get("global_counter", 0)), len(counters))
+    return header + b"".join(_pack_session(tag, int(counter)) for tag, counter in counters.items())
+
+
+_WRAPPER_TEMPLATE = """\
+def wrapper({params}):
+    _lp_t0 = _lp_clock()
+    try:
+        _lp_result = _lp_fn({args})
+    except _lp_BaseException as _lp_exc:
+        _lp_record(_lp_label, _lp_t0, _lp_clock(), _lp_status(_lp_type(_lp_exc).__name__))
+        raise
+    _lp_record(_lp_label, _lp_t0, _lp_clock(), {success})
+    return _lp_result
+"""
+
+
+def _compile_timed_wrapper(
+    func: Callable, label: str, record: Callable, status: Callable
+) -> Optional[Callable]:
+    """
+    Generates a wrapper with ``func``'s exact signature that records straight into the column buffers,
+    skipping ``*args/**kwargs`` repacking and the context manager. Returns None if that isn't possible.
+    """
+    try:
+        # Not following __wrapped__: a decorator may inject or change arguments, so the wrapper
+        # has to mirror the callable it actually calls, not the function underneath it
+        sig = inspect.signature(func, follow_wrapped=False)
+    except (TypeError, ValueError):
+        return None
+
+    namespace = {"_lp_clock": time.perf_counter_ns, "_lp_fn": func, "_lp_label": label}
+    namespace.update(_lp_record=record, _lp_status=status)
+    # Builtins are bound under reserved names too, since parameters like ``type`` would shadow them
+    namespace.update(_lp_type=type, _lp_BaseException=BaseException)
+    params: List[str] = []
+    args: List[str] = []
+    star_seen = False
+    prev_kind = None
+    for i, param in enumerate(sig.parameters.values()):
+        kind = param.kind
+        if param.name.startswith("_lp_"):
+            return None  # Would shadow the generated helpers
+        if prev_kind is inspect.Parameter.POSITIONAL_ONLY and kind is not inspect.Parameter.POSITIONAL_ONLY:
+            params.append("/")
+        if kind is inspect.Parameter.KEYWORD_ONLY and not star_seen:
+            params.append("*")
+            star_seen = True
+
+        if kind is inspect.Parameter.VAR_POSITIONAL:
+            star_seen = True
+            params.append(f"*{param.name}")
+            args.append(f"*{param.name}")
+        elif kind is inspect.Parameter.VAR_KEYWORD:
+            params.append(f"**{param.name}")
+            args.append(f"**{param.name}")
+        else:
+            default = ""
+            if param.default is not inspect.Parameter.empty:
+                # Bound by name so defaults are passed through as the same objects
+                namespace[f"_lp_default{i}"] = param.default
+                default = f"=_lp_default{i}"
+            params.append(param.name + default)
+            args.append(f"{param.name}={param.name}" if kind is inspect.Parameter.KEYWORD_ONLY else param.name)
+        prev_kind = kind
+    if prev_kind is inspect.Parameter.POSITIONAL_ONLY:
+        params.append("/")
+
+    code = _WRAPPER_TEMPLATE.format(params=", ".join(params), args=", ".join(args), success=_SUCCESS)
+    exec(code, namespace)
+    return wraps(func)(namespace["wrapper"])
+
+
+def _csv_field(value) -> bytes:
+    """Encodes a field as text with minimal CSV quoting (same rules as the csv module)."""
+    value = str(value)
+    if any(ch in value for ch in ',"\r\n'):
+        value = '"' + value.replace('"', '""') + '"'
+    return value.encode("utf-8")
+
+
+def _as_int64(buffer: array) -> np.ndarray:
+    """Copies an ``array('q')`` column into NumPy without keeping a buffer export alive."""
+    return np.frombuffer(buffer, dtype=np.int64).copy()
+
+
+def _format_timestamps(wall_ns: np.ndarray) -> np.ndarray:
+    """Converts epoch nanoseconds to local ISO-8601 strings, matching ``datetime.isoformat()``."""
+    local_tz = datetime.now().astimezone().tzinfo
+    stamps = pd.to_datetime(wall_ns, unit="ns", utc=True).tz_convert(local_tz).tz_localize(None)
+    return np.datetime_as_string(stamps.to_numpy(), unit="us")
+
 
 class LogPulse:
     """High-precision, persistent performance logger for cross-execution tracking."""
 
-    def __init__(self, session_tag: str = "default", split_files: bool = False):
+    def __init__(self, session_tag: str = "default", split_files: bool = False, storage_format: str = "csv"):
+        if storage_format not in ("csv", "parquet"):
+            raise ValueError(
+                f"❌ LogPulse: Unsupported storage_format '{storage_format}' (use 'csv' or 'parquet')."
+            )
+
         self.log_dir = Path("logs")
         self.log_dir.mkdir(parents=True, exist_ok=True)
 
         self.session_tag = session_tag
-        self.state_path = self.log_dir / ".logpulse_state.json"
-
-        if split_files:
+        self.storage_format = storage_format
+        self.state_path = self.log_dir / ".logpulse_state.bin"
+        self.legacy_state_path = self.log_dir / ".logpulse_state.json"
+        self.lock_path = self.log_dir / ".logpulse_state.lock"
+
+        if storage_format == "parquet":
+            # A single dataset partitioned by session_tag; split_files is implied by the layout
+            self.storage_path = self.log_dir / "pulse.parquet"
+        elif split_files:
             self.storage_path = self.log_dir / f"{session_tag}.csv"
         else:
             self.storage_path = self.log_dir / "perf_metrics.csv"
 
-        self.records: List[Dict] = []
+        # Anchor both clocks once so wall-clock timestamps can be derived from perf_counter_ns
+        self._epoch_wall_ns = time.time_ns()
+        self._epoch_mono_ns = time.perf_counter_ns()
+
+        # Struct-of-Arrays buffers: the hot path only appends, the DataFrame is built on demand
+        self._reset_buffers()
 
         # Load state and check for storage fragmentation
         state = self._load_state()
@@ -35,13 +207,71 @@ class LogPulse:
 
         self.global_run_id, self.session_run_id = self._get_next_run_ids()
 
+    def _reset_buffers(self) -> None:
+        self._start_ns = array("q")
+        self._end_ns = array("q")
+        self._labels: List[str] = []
+        self._status: List[int] = []
+        self._status_names: List[str] = ["SUCCESS"]
+        self._status_codes: Dict[str, int] = {}
+
+    def _intern_status(self, exc_name: str) -> int:
+        code = self._status_codes.get(exc_name)
+        if code is None:
+            code = self._status_codes[exc_name] = len(self._status_names)
+            self._status_names.append(f"ERROR: {exc_name}")
+        return code
+
+    def _timestamps(self, end_ns: np.ndarray) -> np.ndarray:
+        return _format_timestamps(self._epoch_wall_ns + (end_ns - self._epoch_mono_ns))
+
+    def _columns(self) -> Dict[str, np.ndarray]:
+        """Materializes the column buffers into the on-disk record schema."""
+        start_ns = _as_int64(self._start_ns)
+        end_ns = _as_int64(self._end_ns)
+        status_names = np.array(self._status_names, dtype=object)
+        n = len(self._labels)
+        return {
+            "global_run_id": np.full(n, self.global_run_id, dtype=np.int64),
+            "session_run_id": np.full(n, self.session_run_id, dtype=np.int64),
+            "session_tag": np.full(n, self.session_tag, dtype=object),
+            "timestamp": self._timestamps(end_ns),
+            "label": np.array(self._labels, dtype=object),
+            # Full precision in memory; the CSV writer's %.9f does the rounding on disk
+            "duration_sec": (end_ns - start_ns) / 1_000_000_000,
+            "status": status_names[np.asarray(self._status, dtype=np.intp)],
+        }
+
+    def _to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self._columns())
+
+    @property
+    def records(self) -> List[Dict]:
+        """In-memory measurements as row dicts (materialized from the column buffers)."""
+        if not self._labels:
+            return []
+        return self._to_frame().to_dict("records")
+
     def _load_state(self) -> Dict:
-        """Loads the global state. Migrates legacy v0.1.0 keys if found."""
-        default_state = {"global_counter": 0, "session_counters": {}}
+        """Loads the global state. Falls back to the legacy JSON file if no binary state exists yet."""
         if not self.state_path.exists():
+            return self._load_json_state()
+        try:
+            buf = self.state_path.read_bytes()
+            global_counter, offsets, _ = _parse_state(buf)
+        except (struct.error, ValueError, UnicodeDecodeError, IOError):
+            return {"global_counter": 0, "session_counters": {}}
+
+        counters = {tag: _COUNTER.unpack_from(buf, offset)[0] for tag, offset in offsets.items()}
+        return {"global_counter": global_counter, "session_counters": counters}
+
+    def _load_json_state(self) -> Dict:
+        """Reads the pre-binary JSON state. Migrates legacy v0.1.0 keys if found."""
+        default_state = {"global_counter": 0, "session_counters": {}}
+        if not self.legacy_state_path.exists():
             return default_state
         try:
-            with open(self.state_path, "r") as f:
+            with open(self.legacy_state_path, "r") as f:
                 state = json.load(f)
                 if "global_counter" not in state:  # Legacy 0.1 migration
                     state = {"global_counter": state.get("last_run_id", 0), "session_counters": {}}
@@ -50,54 +280,99 @@ class LogPulse:
             return default_state
 
     def _save_state(self, state: Dict) -> None:
-        with open(self.state_path, "w") as f:
-            json.dump(state, f, indent=4)
+        """Writes the full state to a temp file and swaps it in, so a crash never leaves a torn file."""
+        tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_pack_state(state))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    @contextmanager
+    def _state_lock(self):
+        """Cross-process exclusive lock. Held on a sidecar file because _save_state replaces the state inode."""
+        with open(self.lock_path, "a+b") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)  # Released when the file is closed
+            yield
 
     def _get_next_run_ids(self) -> tuple[int, int]:
-        state = self._load_state()
-        state["global_counter"] = int(state.get("global_counter", 0)) + 1
-
-        session_counters = state.get("session_counters", {})
-        session_counters[self.session_tag] = int(session_counters.get(self.session_tag, 0)) + 1
-        state["session_counters"] = session_counters
-
-        self._save_state(state)
-        return state["global_counter"], session_counters[self.session_tag]
+        """Bumps the global and session counters in place inside the memory-mapped state file."""
+        with self._state_lock(), self._open_state() as f:
+            try:
+                with mmap.mmap(f.fileno(), 0) as mm:
+                    global_counter, offsets, end = _parse_state(mm)
+                    global_counter += 1
+                    offset = offsets.get(self.session_tag)
+                    if offset is not None:
+                        session_counter = _COUNTER.unpack_from(mm, offset)[0] + 1
+                        _COUNTER.pack_into(mm, offset, session_counter)
+                        _COUNTER.pack_into(mm, _STATE_GLOBAL_OFFSET, global_counter)
+                        return global_counter, session_counter
+            except (struct.error, ValueError, UnicodeDecodeError):
+                # Unreadable state starts over, same as a corrupt JSON file used to
+                global_counter, offsets, end = 1, {}, _STATE_HEADER.size
+
+            # New session: append its slot first, then publish it through the header
+            f.seek(end)
+            f.write(_pack_session(self.session_tag, 1))
+            f.truncate()
+            f.seek(0)
+            f.write(_STATE_HEADER.pack(_STATE_MAGIC, global_counter, len(offsets) + 1))
+            return global_counter, 1
+
+    def _open_state(self):
+        if not self.state_path.exists():
+            self._save_state(self._load_state())  # One-time migration from the JSON state
+        return open(self.state_path, "r+b")
 
     def clear_history(self, session_only: bool = True, delete_logs: bool = False):
         """
         Surgically clears history based on the state tracker inventory.
         """
-        state = self._load_state()
-        inventory = state.get("session_counters", {})
+        with self._state_lock():
+            state = self._load_state()
+            inventory = state.get("session_counters", {})
 
-        if session_only:
-            if self.session_tag in inventory:
-                del inventory[self.session_tag]
+            if session_only:
+                if self.session_tag in inventory:
+                    del inventory[self.session_tag]
 
-            if delete_logs and self.storage_path.exists():
-                self.storage_path.unlink()
+                if delete_logs and self.storage_format == "parquet":
+                    # pyarrow URI-encodes partition values in directory names
+                    partition = self.storage_path / f"session_tag={quote(self.session_tag, safe='')}"
+                    if partition.exists():
+                        shutil.rmtree(partition)
+                elif delete_logs and self.storage_path.exists():
+                    self.storage_path.unlink()
 
-            msg = f"✅ LogPulse: Cleared session '{self.session_tag}'."
+                msg = f"✅ LogPulse: Cleared session '{self.session_tag}'."
 
-        else:
-            if delete_logs:
-                main_file = self.log_dir / "perf_metrics.csv"
-                if main_file.exists():
-                    main_file.unlink()
+            else:
+                if delete_logs:
+                    main_file = self.log_dir / "perf_metrics.csv"
+                    if main_file.exists():
+                        main_file.unlink()
 
-                for tag in inventory.keys():
-                    tag_file = self.log_dir / f"{tag}.csv"
-                    if tag_file.exists():
-                        tag_file.unlink()
+                    for tag in inventory.keys():
+                        tag_file = self.log_dir / f"{tag}.csv"
+                        if tag_file.exists():
+                            tag_file.unlink()
 
-                for bak in self.log_dir.glob("*.v1.bak"):
-                    bak.unlink()
+                    dataset = self.log_dir / "pulse.parquet"
+                    if dataset.exists():
+                        shutil.rmtree(dataset)
 
-            state = {"global_counter": 0, "session_counters": {}}
-            msg = "☢️ LogPulse: Inventory-based global reset complete. (User files preserved)."
+                    for bak in self.log_dir.glob("*.v1.bak"):
+                        bak.unlink()
 
-        self._save_state(state)
+                if self.legacy_state_path.exists():
+                    self.legacy_state_path.unlink()  # Would otherwise be re-migrated
+
+                state = {"global_counter": 0, "session_counters": {}}
+                msg = "☢️ LogPulse: Inventory-based global reset complete. (User files preserved)."
+
+            self._save_state(state)
         print(msg)
 
     def measure(self, label: str):
@@ -105,30 +380,83 @@ class LogPulse:
 
     def timeit(self, label: Optional[str] = None):
         def decorator(func):
+            name = label or func.__name__
+            fast = _compile_timed_wrapper(func, name, self._record, self._intern_status)
+            if fast is not None:
+                return fast
+
             @wraps(func)
             def wrapper(*args, **kwargs):
-                with self.measure(label or func.__name__):
+                with self.measure(name):
                     return func(*args, **kwargs)
 
             return wrapper
 
         return decorator
 
+    def _record(self, label: str, start_ns: int, end_ns: int, status: int) -> None:
+        self._start_ns.append(start_ns)
+        self._end_ns.append(end_ns)
+        self._labels.append(label)
+        self._status.append(status)
+
+    def time_batches(self, fn: Callable[[int], Any], n: int, label: Optional[str] = None) -> None:
+        """
+        Times ``fn(0)`` ... ``fn(n - 1)`` as ``n`` separate measurements under one label.
+        A low-overhead alternative to calling ``measure()`` inside a tight loop.
+        """
+        label = label or getattr(fn, "__name__", "batch")
+        clock = time.perf_counter_ns
+        starts = array("q", bytes(8 * n))
+        ends = array("q", bytes(8 * n))
+
+        i = -1
+        try:
+            for i in range(n):
+                starts[i] = clock()
+                fn(i)
+                ends[i] = clock()
+        except BaseException as exc:
+            ends[i] = clock()
+            self._extend_batch(starts, ends, label, i + 1, self._intern_status(type(exc).__name__))
+            raise
+        self._extend_batch(starts, ends, label, n, _SUCCESS)
+
+    def _extend_batch(self, starts: array, ends: array, label: str, count: int, last_status: int) -> None:
+        if count <= 0:
+            return
+        self._start_ns.extend(starts[:count])
+        self._end_ns.extend(ends[:count])
+        self._labels.extend([label] * count)
+        self._status.extend([_SUCCESS] * (count - 1))
+        self._status.append(last_status)
+
     def get_summary(self, auto_print: bool = True) -> pd.DataFrame:
         """
         Calculates descriptive statistics for the current in-memory records.
         Useful for a quick 'Post-Run' check before committing to disk.
         """
-        if not self.records:
+        if not self._labels:
             if auto_print:
                 print("📋 LogPulse: No records in memory to summarize.")
             return pd.DataFrame()
 
-        df = pd.DataFrame(self.records)
-        summary = (
-            df.groupby("label")["duration_sec"]
-            .agg(["mean", "min", "max", "count"])
-            .rename(columns={"mean": "Avg (s)", "min": "Min (s)", "max": "Max (s)", "count": "Runs"})
+        # Sort once by label, then reduce every group in a single pass per statistic
+        codes, labels = pd.factorize(np.array(self._labels, dtype=object), sort=True)
+        order = np.argsort(codes, kind="stable")
+        durations = ((_as_int64(self._end_ns) - _as_int64(self._start_ns)) / 1_000_000_000)[order]
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        runs = np.diff(np.r_[starts, len(sorted_codes)])
+
+        summary = pd.DataFrame(
+            {
+                "Avg (s)": np.add.reduceat(durations, starts) / runs,
+                "Min (s)": np.minimum.reduceat(durations, starts),
+                "Max (s)": np.maximum.reduceat(durations, starts),
+                "Runs": runs,
+            },
+            index=pd.Index(labels, name="label"),
         )
 
         if auto_print:  # later, maybe add formatting options and/or tr-100 machine report format
@@ -137,11 +465,30 @@ class LogPulse:
         return summary
 
     def save(self):
-        """Saves memory records to CSV with a migration check for v0.1 compatibility."""
-        if not self.records:
+        """Persists memory records in the configured storage format and clears the buffers."""
+        if not self._labels:
             return
-        df = pd.DataFrame(self.records)
 
+        if self.storage_format == "parquet":
+            self._save_parquet()
+        else:
+            self._save_csv()
+        self._reset_buffers()
+
+    def _save_parquet(self) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("❌ Run: pip install 'logpulse[parquet]'")
+
+        columns = self._columns()
+        columns["label"] = columns["label"].astype(str)  # Same text form the CSV writer stores
+        table = pa.Table.from_pydict(columns)
+        pq.write_to_dataset(table, root_path=self.storage_path, partition_cols=["session_tag"])
+
+    def _save_csv(self) -> None:
+        """Appends memory records to CSV with a migration check for v0.1 compatibility."""
         if self.storage_path.exists():
             try:
                 existing_cols = pd.read_csv(self.storage_path, nrows=0).columns.tolist()
@@ -153,8 +500,24 @@ class LogPulse:
                 pass
 
         header = not self.storage_path.exists()
-        df.to_csv(self.storage_path, mode="a", index=False, header=header, encoding="utf-8-sig")
-        self.records = []
+
+        # Rows share a fixed schema, so format them directly instead of going through to_csv
+        tag = _csv_field(self.session_tag)
+        labels = {label: _csv_field(label) for label in set(self._labels)}
+        statuses = [_csv_field(name) for name in self._status_names]
+        end_ns = _as_int64(self._end_ns)
+        timestamps = self._timestamps(end_ns).astype("S").tolist()
+        durations = ((end_ns - _as_int64(self._start_ns)) / 1_000_000_000).tolist()
+        gid, sid = self.global_run_id, self.session_run_id
+        rows = [
+            _CSV_ROW % (gid, sid, tag, ts, labels[label], dur, statuses[code])
+            for ts, label, dur, code in zip(timestamps, self._labels, durations, self._status)
+        ]
+
+        with open(self.storage_path, "ab") as f:
+            if header:
+                f.write(codecs.BOM_UTF8 + ",".join(_CSV_COLUMNS).encode() + b"\n")
+            f.writelines(rows)
 
     class _MeasureContext:
         def __init__(self, parent, label):
@@ -166,16 +529,10 @@ class LogPulse:
             return self
 
         def __exit__(self, exc_type, exc_val, exc_tb):
-            duration_s = (time.perf_counter_ns() - self.start_ns) / 1_000_000_000
-            self.parent.records.append(
-                {
-                    "global_run_id": self.parent.global_run_id,
-                    "session_run_id": self.parent.session_run_id,
-                    "session_tag": self.parent.session_tag,
-                    "timestamp": datetime.now().isoformat(),
-                    "label": self.label,
-                    "duration_sec": round(duration_s, 9),
-                    "status": "SUCCESS" if not exc_type else f"ERROR: {exc_type.__name__}",
-                }
-            )
+            end_ns = time.perf_counter_ns()
+            parent = self.parent
+            parent._start_ns.append(self.start_ns)
+            parent._end_ns.append(end_ns)
+            parent._labels.append(self.label)
+            parent._status.append(_SUCCESS if exc_type is None else parent._intern_status(exc_type.__name__))
             return False  # Don't suppress exceptions
@@ -1,8 +1,76 @@
+import functools
+import io
+import mmap
+import os
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from .main import _csv_field
+
+try:
+    import bottleneck as bn
+except ImportError:  # Optional accelerator; the NumPy fallback gives the same result
+    bn = None
+
+# Columns the plots actually consume; reads project down to these
+_PLOT_COLUMNS = ["global_run_id", "session_run_id", "session_tag", "label", "duration_sec"]
+# Low-cardinality text columns, loaded as categoricals so downstream groupbys work on integer codes
+_CATEGORY_DTYPES = {"session_tag": "category", "label": "category"}
+# plot_distribution: shared histogram bins and the max rows per session fed to the KDE
+_HIST_BINS = 64
+_KDE_SAMPLE = 2000
+
+
+@functools.cache
+def _plt_sns():
+    """Imports the plotting stack once; later calls return the cached modules."""
+    try:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+    except ImportError:
+        raise ImportError("❌ Run: pip install 'logpulse[viz]'")
+    return plt, sns
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over ``window`` samples; the first rows average what is available (``min_periods=1``)."""
+    window = max(window, 1)
+    if bn is not None:
+        return bn.move_mean(values, window=window, min_count=1)
+
+    cs = np.cumsum(values, dtype=np.float64)
+    out = np.empty_like(cs)
+    out[:window] = cs[:window] / np.arange(1, min(window, len(cs)) + 1)
+    out[window:] = (cs[window:] - cs[:-window]) / window
+    return out
+
+
+def _gaussian_kde(sample: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """Gaussian kernel density of ``sample`` on ``grid`` using Scott's bandwidth (scipy/seaborn default)."""
+    n = len(sample)
+    std = sample.std(ddof=1) if n > 1 else 0.0
+    if not std:
+        return np.zeros_like(grid)
+    bandwidth = std * n ** (-1 / 5)
+    z = (grid[:, None] - sample[None, :]) / bandwidth
+    return np.exp(-0.5 * z * z).sum(axis=1) / (n * bandwidth * np.sqrt(2 * np.pi))
+
+
+def _session_run_ids(session_tags) -> np.ndarray:
+    """1-based position of each row within its session (``groupby(...).cumcount() + 1`` without a groupby)."""
+    codes, _ = pd.factorize(session_tags)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    run_lengths = np.diff(np.r_[starts, len(codes)])
+
+    run_ids = np.empty(len(codes), dtype=np.int64)
+    run_ids[order] = np.arange(len(codes)) - np.repeat(starts, run_lengths) + 1
+    return run_ids
+
 
 class PulseVisualizer:
     """Professional visualization engine for LogPulse performance data."""
@@ -11,34 +79,124 @@ class PulseVisualizer:
         self.storage_path = Path(storage_path)
         if not self.storage_path.exists():
             raise FileNotFoundError(f"?? No logs found at {storage_path}")
+        # Parsed log keyed by its on-disk fingerprint, reused across plot_* calls
+        self._cache: Optional[Tuple[Tuple, pd.DataFrame]] = None
+
+    def _fingerprint(self) -> Tuple:
+        """(mtime, size) of the log; a Parquet dataset is fingerprinted over its data files."""
+        if self.storage_path.is_dir():
+            stats = [f.stat() for f in self.storage_path.rglob("*.parquet")]
+            return (
+                max((st.st_mtime_ns for st in stats), default=0),
+                sum(st.st_size for st in stats),
+                len(stats),
+            )
+        st = self.storage_path.stat()
+        return (st.st_mtime_ns, st.st_size)
 
-    def _load_and_filter(self, tags: Optional[List[str]] = None) -> pd.DataFrame:
-        df = pd.read_csv(self.storage_path)
+    def _read_log(self, tags: Optional[List[str]] = None) -> pd.DataFrame:
+        """Returns the parsed log, re-reading it only when the file changed since the last call."""
+        parquet = self.storage_path.suffix == ".parquet"
+        # Parquet reads are already filtered by tag, so the tags are part of the cache key
+        key = (self._fingerprint(), tuple(tags) if parquet and tags else None)
+        if self._cache is None or self._cache[0] != key:
+            df = self._load_parquet(tags) if parquet else self._load_csv()
+            self._cache = (key, df)
+        return self._cache[1]
+
+    def _load_csv(self, source=None) -> pd.DataFrame:
+        df = pd.read_csv(
+            self.storage_path if source is None else source,
+            usecols=lambda col: col in _PLOT_COLUMNS or col == "run_id",
+            dtype=_CATEGORY_DTYPES,
+        )
 
         # MIGRATION LOGIC: Backwards compatibility for v0.1 users
         if "run_id" in df.columns and "session_run_id" not in df.columns:
             # If it's an old file, treat the global run_id as both for now
             df["global_run_id"] = df["run_id"]
-            df["session_run_id"] = df.groupby("session_tag").cumcount() + 1
+            df["session_run_id"] = _session_run_ids(df["session_tag"].to_numpy())
+
+        return df
+
+    def _scan_csv_tag(self, tag: str) -> Optional[pd.DataFrame]:
+        """
+        Pulls a single session's rows out of the CSV through mmap, so the rest of the file is never parsed.
+        Returns None when the file layout doesn't allow a safe byte-level scan.
+        """
+        if os.path.getsize(self.storage_path) == 0:
+            return None
+        with open(self.storage_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = mm.find(b"\n")
+            if header_end < 0:
+                return None
+            header = mm[: header_end + 1]
+            columns = header.decode("utf-8-sig").strip().split(",")
+            if "session_tag" not in columns or columns[-1] == "session_tag":
+                return None
+            col = columns.index("session_tag")
+
+            # The tag field, bounded by the delimiters around it, as the writer would have encoded it
+            needle = (b"\n" if col == 0 else b",") + _csv_field(tag) + b","
+            rows = []
+            pos = header_end
+            while (hit := mm.find(needle, pos)) >= 0:
+                line_start = mm.rfind(b"\n", 0, hit + 1) + 1
+                # Only keep the hit if it sits in the session_tag column. Otherwise keep searching the
+                # same line: e.g. tag "1" also matches the run-id fields of "1,1,1,...".
+                if col != 0 and mm[line_start:hit].count(b",") != col - 1:
+                    pos = hit + 1
+                    continue
+
+                line_end = mm.find(b"\n", hit + 1)
+                row = mm[line_start:] + b"\n" if line_end < 0 else mm[line_start : line_end + 1]
+                if row.count(b'"') % 2:
+                    return None  # A quoted field spans lines; only the full parser handles that
+                rows.append(row)
+                if line_end < 0:
+                    break
+                pos = line_end
+
+        try:
+            return self._load_csv(io.BytesIO(header + b"".join(rows)))
+        except pd.errors.ParserError:
+            return None
 
+    def _load_and_filter(self, tags: Optional[List[str]] = None, sort: bool = True) -> pd.DataFrame:
+        """Returns the (optionally tag-filtered) log; ``sort`` orders it chronologically for line plots."""
+        csv = self.storage_path.suffix != ".parquet"
+        cache_stale = self._cache is None or self._cache[0][0] != self._fingerprint()
+        if csv and cache_stale and tags and len(tags) == 1:
+            df = self._scan_csv_tag(tags[0])
+            if df is not None:
+                return df.sort_values("global_run_id") if sort else df
+
+        df = self._read_log(tags)
         if tags:
             df = df[df["session_tag"].isin(tags)]
+            df = df.assign(session_tag=df["session_tag"].cat.remove_unused_categories())
 
-        return df.sort_values("global_run_id")
+        # Always hand out a new frame so callers never mutate the cached one
+        return df.sort_values("global_run_id") if sort else df.copy(deep=False)
 
-    def _ensure_run_indices(self, df: pd.DataFrame) -> pd.DataFrame:
-        if "session_run_id" not in df.columns:
-            df = df.copy()
-            df["session_run_id"] = df.groupby("session_tag").cumcount() + 1
-        if "global_run_id" not in df.columns:
-            df = df.copy()
-            df["global_run_id"] = range(1, len(df) + 1)
+    def _load_parquet(self, tags: Optional[List[str]] = None) -> pd.DataFrame:
+        """Reads a partitioned LogPulse dataset, pushing the tag filter down to the partitions."""
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("❌ Run: pip install 'logpulse[parquet]'")
+
+        filters = [("session_tag", "in", list(tags))] if tags else None
+        df = pq.read_table(self.storage_path, columns=_PLOT_COLUMNS, filters=filters).to_pandas()
+        # Partition keys come back as a categorical listing every partition on disk
+        df["session_tag"] = df["session_tag"].cat.remove_unused_categories()
+        df["label"] = df["label"].astype("category")
         return df
 
     def _ensure_run_indices(self, df: pd.DataFrame) -> pd.DataFrame:
         if "session_run_id" not in df.columns:
             df = df.copy()
-            df["session_run_id"] = df.groupby("session_tag").cumcount() + 1
+            df["session_run_id"] = _session_run_ids(df["session_tag"].to_numpy())
         if "global_run_id" not in df.columns:
             df = df.copy()
             df["global_run_id"] = range(1, len(df) + 1)
@@ -46,14 +204,10 @@ class PulseVisualizer:
 
     def plot_session(self, tag: str, start_idx: int = 0, end_idx: Optional[int] = None):
         """Visualizes a specific range of a session (Zoom-in)."""
-        try:
-            import matplotlib.pyplot as plt
-            import seaborn as sns
-        except ImportError:
-            raise ImportError("? Run: pip install 'logpulse[viz]'")
+        plt, sns = _plt_sns()
 
         # 1. Load and Slice the data
-        df = self._load_and_filter([tag])
+        df = self._load_and_filter([tag], sort=False)
         df = self._ensure_run_indices(df)
         df = df.sort_values("session_run_id").reset_index(drop=True)
 
@@ -78,13 +232,9 @@ class PulseVisualizer:
 
     def compare_sessions(self, tags: Optional[List[str]] = None):
         """Compares multiple sessions side-by-side using session-scoped IDs."""
-        try:
-            import matplotlib.pyplot as plt
-            import seaborn as sns
-        except ImportError:
-            raise ImportError("❌ Run: pip install 'logpulse[viz]'")
+        plt, sns = _plt_sns()
 
-        df = self._load_and_filter(tags)
+        df = self._load_and_filter(tags, sort=False)
 
         fig, axes = plt.subplots(1, 2, figsize=(15, 6))
 
@@ -103,25 +253,37 @@ class PulseVisualizer:
 
     def plot_distribution(self, tags: Optional[List[str]] = None):
         """Detailed histogram to see 'clusters' of performance."""
-        try:
-            import matplotlib.pyplot as plt
-            import seaborn as sns
-        except ImportError:
-            raise ImportError("? Run: pip install 'logpulse[viz]'")
+        plt, sns = _plt_sns()
+
+        df = self._load_and_filter(tags, sort=False)
+        durations = df["duration_sec"].to_numpy(dtype=np.float64)
+        codes, session_tags = pd.factorize(df["session_tag"])
+
+        # Bin and smooth every session in NumPy, then draw each one with a single call
+        edges = np.histogram_bin_edges(durations, bins=_HIST_BINS)
+        grid = np.linspace(edges[0], edges[-1], 256)
+        rng = np.random.default_rng(0)
 
-        df = self._load_and_filter(tags)
         plt.figure(figsize=(10, 6))
-        sns.histplot(data=df, x="duration_sec", hue="session_tag", kde=True, element="step")
+        for code, (tag, color) in enumerate(zip(session_tags, sns.color_palette(n_colors=len(session_tags)))):
+            values = durations[codes == code]
+            counts, _ = np.histogram(values, bins=edges)
+            plt.stairs(counts, edges, fill=True, alpha=0.25, color=color)
+            plt.stairs(counts, edges, color=color, label=str(tag))
+
+            sample = values if len(values) <= _KDE_SAMPLE else rng.choice(values, _KDE_SAMPLE, replace=False)
+            # Scale the density to counts so the curve sits on the histogram
+            plt.plot(grid, _gaussian_kde(sample, grid) * len(values) * (edges[1] - edges[0]), color=color)
+
+        plt.legend(title="session_tag")
+        plt.xlabel("duration_sec")
+        plt.ylabel("Count")
         plt.title("Latency Density (Distribution Shape)")
         plt.show()
 
     def plot_system_drift(self):
         """Visualizes latency trends across the entire history of the project."""
-        try:
-            import matplotlib.pyplot as plt
-            import seaborn as sns
-        except ImportError:
-            raise ImportError("? Run: pip install 'logpulse[viz]'")
+        plt, sns = _plt_sns()
 
         df = self._load_and_filter()
         plt.figure(figsize=(12, 5))
@@ -131,7 +293,7 @@ class PulseVisualizer:
         # Add a moving average to see the "Pulse" of the system
 
         window_size = min(len(df), 50)  # Use 50, or the whole dataset if smaller
-        df["rolling_mean"] = df["duration_sec"].rolling(window=window_size, min_periods=1).mean()
+        df["rolling_mean"] = _rolling_mean(df["duration_sec"].to_numpy(dtype=np.float64), window_size)
 
         sns.lineplot(data=df, x="global_run_id", y="rolling_mean", color="red")
 
@@ -1,6 +1,10 @@
+import functools
+import inspect
+import json
 import time
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -39,6 +43,129 @@ def test_exception_handling():
     assert logger.records[0]["status"] == "ERROR: ValueError"
 
 
+def test_mixed_status_buffering():
+    """Verify interned status codes map back to the right labels in order."""
+    logger = LogPulse()
+    for exc in (None, KeyError, None, ValueError, KeyError):
+        try:
+            with logger.measure("op"):
+                if exc:
+                    raise exc()
+        except (KeyError, ValueError):
+            pass
+
+    statuses = [r["status"] for r in logger.records]
+    assert statuses == ["SUCCESS", "ERROR: KeyError", "SUCCESS", "ERROR: ValueError", "ERROR: KeyError"]
+
+
+def test_time_batches():
+    """Each call in a batch becomes its own record; a failure ends the batch."""
+    logger = LogPulse()
+    seen = []
+    logger.time_batches(seen.append, 5, label="append")
+    assert seen == [0, 1, 2, 3, 4]
+
+    def flaky(i):
+        if i == 2:
+            raise RuntimeError("nope")
+
+    with pytest.raises(RuntimeError):
+        logger.time_batches(flaky, 10)
+
+    records = logger.records
+    assert [r["label"] for r in records] == ["append"] * 5 + ["flaky"] * 3
+    assert [r["status"] for r in records[5:]] == ["SUCCESS", "SUCCESS", "ERROR: RuntimeError"]
+    assert all(r["duration_sec"] >= 0 for r in records)
+
+
+def test_timeit_preserves_signature():
+    """The generated timeit wrapper behaves exactly like the wrapped function."""
+    logger = LogPulse()
+    sentinel = object()
+
+    @logger.timeit()
+    def fn(a, b=2, /, c=3, *args, d, e=sentinel, **kwargs):
+        """Docstring."""
+        return a, b, c, args, d, e, kwargs
+
+    assert fn(1, d=4) == (1, 2, 3, (), 4, sentinel, {})
+    assert fn(1, 5, 6, 7, 8, d=9, e=10, f=11) == (1, 5, 6, (7, 8), 9, 10, {"f": 11})
+    assert fn.__name__ == "fn" and fn.__doc__ == "Docstring."
+    assert str(inspect.signature(fn)) == "(a, b=2, /, c=3, *args, d, e=<object object at %#x>, **kwargs)" % id(
+        sentinel
+    )
+    with pytest.raises(TypeError):
+        fn(a=1, d=4)  # Positional-only stays positional-only
+
+    @logger.timeit("boom")
+    def failing(*, flag):
+        raise KeyError(flag)
+
+    with pytest.raises(KeyError):
+        failing(flag=True)
+
+    records = logger.records
+    assert [r["label"] for r in records] == ["fn", "fn", "boom"]
+    assert [r["status"] for r in records] == ["SUCCESS", "SUCCESS", "ERROR: KeyError"]
+
+
+def test_timeit_parameters_shadowing_builtins():
+    """Parameters named like builtins the generated wrapper relies on don't break error recording."""
+    logger = LogPulse()
+
+    @logger.timeit()
+    def lookup(type, key, BaseException=None):
+        raise KeyError(key)
+
+    with pytest.raises(KeyError):
+        lookup("str", "missing")
+
+    assert logger.records[0]["status"] == "ERROR: KeyError"
+
+
+def test_timeit_falls_back_for_unsupported_callables():
+    from logpulse.main import _compile_timed_wrapper
+
+    logger = LogPulse()
+
+    def opaque(x):
+        return x
+
+    opaque.__signature__ = "not a signature"  # Makes inspect.signature() raise TypeError
+    assert _compile_timed_wrapper(opaque, "opaque", logger._record, logger._intern_status) is None
+    timed_opaque = logger.timeit()(opaque)
+    assert timed_opaque(2) == 2
+
+    @logger.timeit()
+    def clash(_lp_fn):
+        return _lp_fn
+
+    assert _compile_timed_wrapper(clash.__wrapped__, "clash", logger._record, logger._intern_status) is None
+    assert clash(5) == 5
+    assert [r["label"] for r in logger.records] == ["opaque", "clash"]
+
+
+def test_timeit_on_argument_injecting_decorator():
+    """Stacked on a functools.wraps decorator, timeit mirrors the outer callable's signature."""
+    logger = LogPulse()
+
+    def inject(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return func("db", *args, **kwargs)
+
+        return wrapper
+
+    @logger.timeit()
+    @inject
+    def query(db, sql):
+        return db, sql
+
+    assert query("select") == ("db", "select")
+    assert query(sql="select") == ("db", "select")
+    assert logger.records[0]["label"] == "query"
+
+
 def test_summary_generation():
     """Verify that get_summary uses machine-readable column names."""
     iterations = 3
@@ -52,6 +179,22 @@ def test_summary_generation():
     assert summary.loc["repeat", "Runs"] == iterations
 
 
+def test_summary_matches_groupby():
+    """The single-pass summary agrees with a plain pandas groupby."""
+    logger = LogPulse()
+    for label in ["b", "a", "c", "a", "b", "a"]:
+        with logger.measure(label):
+            pass
+
+    summary = logger.get_summary(auto_print=False)
+    expected = (
+        pd.DataFrame(logger.records).groupby("label")["duration_sec"].agg(["mean", "min", "max", "count"])
+    )
+    assert summary.index.tolist() == ["a", "b", "c"]
+    np.testing.assert_allclose(summary[["Avg (s)", "Min (s)", "Max (s)"]].to_numpy(), expected.iloc[:, :3])
+    assert summary["Runs"].tolist() == expected["count"].tolist()
+
+
 def test_dual_id_persistence():
     """Test the core v0.2.0 feature: Global vs Session ID tracking."""
     # 1. First session (Starts at 1/1)
@@ -98,12 +241,57 @@ def test_history_clearing_surgical():
     # Delete one
     l2.clear_history(delete_logs=True)
 
-    # Check JSON state
+    # Check persisted state
     state = l2._load_state()
     assert "delete_me" not in state["session_counters"]
     assert "keep_me" in state["session_counters"]
 
 
+def test_json_state_migration():
+    """A pre-binary JSON state file is migrated once and counting resumes from it."""
+    logger = LogPulse()
+    logger.state_path.unlink()
+    logger.legacy_state_path.write_text(json.dumps({"global_counter": 41, "session_counters": {"alpha": 6}}))
+
+    resumed = LogPulse(session_tag="alpha")
+    assert (resumed.global_run_id, resumed.session_run_id) == (42, 7)
+    assert resumed.state_path.exists()
+
+    fresh = LogPulse(session_tag="beta")
+    assert (fresh.global_run_id, fresh.session_run_id) == (43, 1)
+    assert fresh._load_state()["session_counters"] == {"alpha": 7, "beta": 1}
+
+
+def test_state_save_is_atomic():
+    """State is swapped in via a temp file that never outlives the write."""
+    logger = LogPulse(session_tag="alpha")
+    logger.clear_history()
+
+    assert not list(Path("logs").glob("*.tmp"))
+    assert logger._load_state()["session_counters"] == {}
+    assert LogPulse(session_tag="alpha").session_run_id == 1
+
+
+def test_corrupt_state_resets_counters():
+    logger = LogPulse()
+    logger.state_path.write_bytes(b"garbage")
+
+    recovered = LogPulse(session_tag="alpha")
+    assert (recovered.global_run_id, recovered.session_run_id) == (1, 1)
+    assert recovered._load_state() == {"global_counter": 1, "session_counters": {"alpha": 1}}
+
+
+def test_truncated_state_resets_counters():
+    """A state file cut short inside its last counter slot is treated as unreadable."""
+    LogPulse(session_tag="alpha")
+    logger = LogPulse(session_tag="beta")
+    logger.state_path.write_bytes(logger.state_path.read_bytes()[:-3])
+
+    assert logger._load_state() == {"global_counter": 0, "session_counters": {}}
+    recovered = LogPulse(session_tag="alpha")
+    assert (recovered.global_run_id, recovered.session_run_id) == (1, 1)
+
+
 def test_legacy_migration_logic(tmp_path):
     """Simulate a v0.1.0 CSV and ensure LogPulse archives it."""
     log_dir = Path("logs")
@@ -124,3 +312,192 @@ def test_legacy_migration_logic(tmp_path):
     assert (log_dir / "perf_metrics.v1.bak").exists()
     new_df = pd.read_csv(csv_file)
     assert "global_run_id" in new_df.columns
+
+
+def test_csv_roundtrip_quoting():
+    """Labels with CSV metacharacters survive the fast-path writer."""
+    labels = ["plain", "with,comma", 'with "quotes"']
+    logger = LogPulse(session_tag="quoting", split_files=True)
+    for label in labels:
+        with logger.measure(label):
+            pass
+    logger.save()
+    logger.save()  # Empty buffer is a no-op
+
+    df = pd.read_csv(Path("logs") / "quoting.csv")
+    assert df["label"].tolist() == labels
+    assert (df["session_tag"] == "quoting").all()
+    assert (df["status"] == "SUCCESS").all()
+    assert df.columns[0] == "global_run_id"
+
+
+def test_csv_non_string_labels():
+    """Labels are stringified on save, as to_csv used to do."""
+    logger = LogPulse(session_tag="numeric", split_files=True)
+    with logger.measure(123):
+        pass
+    logger.save()
+
+    df = pd.read_csv(Path("logs") / "numeric.csv", dtype={"label": str})
+    assert df["label"].tolist() == ["123"]
+
+
+def test_parquet_storage_partitions_by_session():
+    """Verify storage_format='parquet' writes one partition per session_tag."""
+    pytest.importorskip("pyarrow")
+    from logpulse.viz import PulseVisualizer
+
+    for tag in ("alpha", "beta"):
+        logger = LogPulse(session_tag=tag, storage_format="parquet")
+        with logger.measure("task"):
+            pass
+        logger.save()
+
+    dataset = Path("logs") / "pulse.parquet"
+    assert (dataset / "session_tag=alpha").is_dir()
+    assert (dataset / "session_tag=beta").is_dir()
+
+    df = PulseVisualizer(storage_path=str(dataset))._load_and_filter(["beta"])
+    assert df["session_tag"].tolist() == ["beta"]
+    assert df["global_run_id"].tolist() == [2]
+
+
+def test_parquet_clear_history_with_encoded_tag():
+    """Session-only clearing finds partitions whose tag pyarrow had to URI-encode."""
+    pytest.importorskip("pyarrow")
+
+    for tag in ("a b", "keep"):
+        logger = LogPulse(session_tag=tag, storage_format="parquet")
+        with logger.measure(7):
+            pass
+        logger.save()
+
+    dataset = Path("logs") / "pulse.parquet"
+    assert (dataset / "session_tag=a%20b").is_dir()
+    LogPulse(session_tag="a b", storage_format="parquet").clear_history(delete_logs=True)
+    assert not (dataset / "session_tag=a%20b").exists()
+    assert (dataset / "session_tag=keep").is_dir()
+
+
+def test_invalid_storage_format():
+    with pytest.raises(ValueError):
+        LogPulse(storage_format="xlsx")
+
+
+def test_session_run_ids_match_cumcount():
+    from logpulse.viz import _session_run_ids
+
+    tags = pd.Series(["a", "b", "a", "c", "b", "a"])
+    expected = (tags.groupby(tags).cumcount() + 1).tolist()
+    assert _session_run_ids(tags.to_numpy()).tolist() == expected
+    assert _session_run_ids(np.array([], dtype=object)).tolist() == []
+
+
+def test_visualizer_reuses_parsed_log():
+    """PulseVisualizer only re-parses the CSV when it changes on disk."""
+    from logpulse.viz import PulseVisualizer
+
+    logger = LogPulse(session_tag="cached")
+    with logger.measure("task"):
+        pass
+    logger.save()
+
+    viz = PulseVisualizer()
+    first = viz._load_and_filter()
+    cached = viz._cache[1]
+    first["duration_sec"] = -1.0  # Mutating a result must not leak into the cache
+    assert viz._load_and_filter()["duration_sec"].ge(0).all()
+    assert viz._cache[1] is cached
+
+    logger = LogPulse(session_tag="cached")
+    with logger.measure("task"):
+        pass
+    logger.save()
+    assert len(viz._load_and_filter()) == 2
+    assert viz._cache[1] is not cached
+
+
+@pytest.mark.parametrize("window", [1, 3, 50])
+def test_rolling_mean_matches_pandas(window):
+    from logpulse.viz import _rolling_mean
+
+    values = np.random.default_rng(0).normal(size=20)
+    expected = pd.Series(values).rolling(window=window, min_periods=1).mean().to_numpy()
+    np.testing.assert_allclose(_rolling_mean(values, window), expected)
+
+
+def test_single_tag_scan_matches_full_read():
+    """The mmap scan returns exactly the rows a full parse + filter would."""
+    from logpulse.viz import PulseVisualizer
+
+    for tag, label in [
+        ("alpha", "beta"),
+        ("beta", "alpha"),
+        ("alpha", "x,y"),
+        ("al", "alpha"),
+        ("beta", 'q"t'),
+        ("1", "alpha"),
+        ("2", "alpha"),
+        ("1", "alpha"),
+        ("10", "1"),
+    ]:
+        logger = LogPulse(session_tag=tag)
+        with logger.measure(label):
+            pass
+        logger.save()
+
+    viz = PulseVisualizer()
+    for tag in ("alpha", "beta", "al", "missing", "1", "2", "10"):
+        scanned = viz._scan_csv_tag(tag)
+        full = viz._load_csv()
+        full = full[full["session_tag"] == tag]
+        assert not full.empty or tag == "missing"
+        assert scanned["global_run_id"].tolist() == full["global_run_id"].tolist()
+        assert scanned["label"].astype(str).tolist() == full["label"].astype(str).tolist()
+
+    # A label with an embedded newline makes the byte scan unsafe; loads fall back to the full parse
+    logger = LogPulse(session_tag="alpha")
+    with logger.measure("multi\nline"):
+        pass
+    logger.save()
+
+    assert viz._scan_csv_tag("alpha") is None
+    labels = viz._load_and_filter(["alpha"])["label"].astype(str).tolist()
+    assert labels == ["beta", "x,y", "multi\nline"]
+
+
+def test_gaussian_kde_is_a_density():
+    from logpulse.viz import _gaussian_kde
+
+    sample = np.random.default_rng(0).normal(0.4, 0.05, size=500)
+    grid = np.linspace(0.0, 0.8, 2001)
+    density = _gaussian_kde(sample, grid)
+    assert density.sum() * (grid[1] - grid[0]) == pytest.approx(1.0, abs=1e-3)
+    assert grid[density.argmax()] == pytest.approx(0.4, abs=0.02)
+    assert not _gaussian_kde(np.array([1.0]), grid).any()
+
+
+def test_load_and_filter_sort_and_categoricals():
+    """Filtered loads keep only requested tags as categories; sort=False keeps file order."""
+    from logpulse.viz import PulseVisualizer
+
+    for tag in ("b", "a", "c", "a"):
+        logger = LogPulse(session_tag=tag)
+        with logger.measure("task"):
+            pass
+        logger.save()
+
+    # Rewrite the log out of chronological order
+    path = Path("logs") / "perf_metrics.csv"
+    pd.read_csv(path).iloc[::-1].to_csv(path, index=False)
+
+    viz = PulseVisualizer()
+    unsorted = viz._load_and_filter(["a", "b"], sort=False)
+    ordered = viz._load_and_filter(["a", "b"])
+    assert unsorted["global_run_id"].tolist() == [4, 2, 1]
+    assert ordered["global_run_id"].tolist() == [1, 2, 4]
+
+    assert isinstance(ordered["session_tag"].dtype, pd.CategoricalDtype)
+    assert isinstance(ordered["label"].dtype, pd.CategoricalDtype)
+    assert sorted(ordered["session_tag"].cat.categories) == ["a", "b"]
+    assert sorted(viz._load_and_filter()["session_tag"].cat.categories) == ["a", "b", "c"]